@@ -0,0 +1,84 @@
+import json
+import os
+import time
+from tempfile import TemporaryDirectory
+from unittest import TestCase, mock
+
+import toggl
+from toggl import CACHE_MAX_AGE, MonthRange, get_detailed_report, is_fresh
+
+TASKS = [{"project_id": 1, "description": "task", "time_entries": []}]
+
+
+class TestCache(TestCase):
+    def setUp(self):
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        cache_dir = f"{tmp.name}/"
+        patcher = mock.patch.object(toggl, "CACHE_DIR", cache_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.month_range = MonthRange(6, 2023)
+        self.filename = (
+            f"{cache_dir}{toggl.WORKSPACE_ID}_"
+            f"{self.month_range.start}_{self.month_range.end}.json"
+        )
+
+        response = mock.Mock(content=json.dumps(TASKS).encode())
+        patcher = mock.patch.object(toggl.SESSION, "post", return_value=response)
+        self.post = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_cache(self, tasks, age_seconds=0):
+        with open(self.filename, "w") as cache:
+            json.dump(tasks, cache)
+        modified = time.time() - age_seconds
+        os.utime(self.filename, (modified, modified))
+
+    def read_cache(self):
+        with open(self.filename) as cache:
+            return json.load(cache)
+
+    def test_is_fresh__missing(self):
+        self.assertFalse(is_fresh(self.filename))
+
+    def test_is_fresh__fresh(self):
+        self.write_cache(TASKS)
+        self.assertTrue(is_fresh(self.filename))
+
+    def test_is_fresh__stale(self):
+        self.write_cache(TASKS, CACHE_MAX_AGE.total_seconds() + 60)
+        self.assertFalse(is_fresh(self.filename))
+
+    def test_get_detailed_report__cache_hit(self):
+        cached = [{"project_id": 2, "description": "cached", "time_entries": []}]
+        self.write_cache(cached)
+        self.assertEqual(get_detailed_report(self.month_range, True), cached)
+        self.post.assert_not_called()
+
+    def test_get_detailed_report__cache_stale(self):
+        self.write_cache([], CACHE_MAX_AGE.total_seconds() + 60)
+        self.assertEqual(get_detailed_report(self.month_range, True), TASKS)
+        self.post.assert_called_once()
+        self.assertEqual(self.read_cache(), TASKS)
+
+    def test_get_detailed_report__cache_not_used(self):
+        self.write_cache([])
+        self.assertEqual(get_detailed_report(self.month_range, False), TASKS)
+        self.post.assert_called_once()
+        self.assertEqual(self.read_cache(), TASKS)
+
+    def test_get_detailed_report__invalid_response_not_cached(self):
+        self.post.return_value.content = b"[{"
+        with self.assertRaises(json.JSONDecodeError):
+            get_detailed_report(self.month_range, False)
+        self.assertFalse(os.path.exists(self.filename))
+
+    def test_get_detailed_report__failed_write_leaves_no_files(self):
+        self.write_cache([])
+        with mock.patch.object(toggl.os, "replace", side_effect=OSError):
+            with self.assertRaises(OSError):
+                get_detailed_report(self.month_range, False)
+        self.assertEqual(os.listdir(toggl.CACHE_DIR), [os.path.basename(self.filename)])
+        self.assertEqual(self.read_cache(), [])
@@ -1,4 +1,5 @@
 import datetime
+from dataclasses import replace
 from unittest import TestCase
 from tests.factories import TimeEntryFactory
 
@@ -11,18 +12,24 @@ from toggl import (
 
 
 class TestCorrectnessCheck(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Single-field variations are copied from one entry built by the factory.
+        cls.entry = TimeEntryFactory()
+
     def test_check_if_empty__empty_description(self):
-        entry = TimeEntryFactory(description="")
+        entry = replace(self.entry, description="")
         with self.assertLogs(level="WARN") as log:
             check_if_empty([entry])
             self.assertEqual(len(log.output), 1)
+            self.assertNotIn("Found", log.output[0])
             self.assertIn(
                 f"{entry.project_id} at {entry.start} has empty description.",
                 log.output[0],
             )
 
     def test_check_if_empty__empty_project(self):
-        entry = TimeEntryFactory(project_id=None)
+        entry = replace(self.entry, project_id=None)
         with self.assertLogs(level="WARN") as log:
             check_if_empty([entry])
             self.assertEqual(len(log.output), 1)
@@ -31,24 +38,35 @@ class TestCorrectnessCheck(TestCase):
                 log.output[0],
             )
 
+    def test_check_if_empty__empty_description_and_project(self):
+        entry = replace(self.entry, description="", project_id=None)
+        with self.assertLogs(level="WARN") as log:
+            check_if_empty([entry])
+            self.assertEqual(len(log.output), 1)
+            self.assertIn("Found 2 issues:", log.output[0])
+            self.assertIn(
+                f"None at {entry.start} has empty description.\n"
+                f"Entry:  at {entry.start} has empty project.",
+                log.output[0],
+            )
+
     def test_check_if_empty__no_empty(self):
-        entry = TimeEntryFactory()
         with self.assertNoLogs(level="WARN") as _:
-            check_if_empty([entry])
+            check_if_empty([self.entry])
 
     def test_check_reasonable_time__duration_lte_8h(self):
         duration_7h = 7 * SECONDS_IN_H
         duration_8h = 8 * SECONDS_IN_H
         duration_almost_8h = 8.001 * SECONDS_IN_H
-        entry1 = TimeEntryFactory(seconds=duration_7h)
-        entry2 = TimeEntryFactory(seconds=duration_8h)
-        entry3 = TimeEntryFactory(seconds=duration_almost_8h)
+        entry1 = replace(self.entry, seconds=duration_7h)
+        entry2 = replace(self.entry, seconds=duration_8h)
+        entry3 = replace(self.entry, seconds=duration_almost_8h)
         with self.assertNoLogs(level="WARN") as _:
             check_reasonable_time([entry1, entry2, entry3])
 
     def test_check_reasonable_time_over_8h(self):
         duration_over_8h = 8.01 * SECONDS_IN_H
-        entry = TimeEntryFactory(seconds=duration_over_8h)
+        entry = replace(self.entry, seconds=duration_over_8h)
         with self.assertLogs(level="WARN") as log:
             check_reasonable_time([entry])
             self.assertEqual(len(log.output), 1)
@@ -63,6 +81,12 @@ class TestCorrectnessCheck(TestCase):
         with self.assertNoLogs(level="WARN") as _:
             check_if_overlapping([entry1, entry2])
 
+    def test_check_if_overlapping__no_overlapping_unordered(self):
+        entry1 = TimeEntryFactory()
+        entry2 = TimeEntryFactory(start=entry1.stop)
+        with self.assertNoLogs(level="WARN") as _:
+            check_if_overlapping([entry2, entry1])
+
     def test_check_if_overlapping__overlapping(self):
         entry1 = TimeEntryFactory()
         entry2 = TimeEntryFactory(start=entry1.stop - datetime.timedelta(seconds=1))
@@ -74,3 +98,19 @@ class TestCorrectnessCheck(TestCase):
                 f"{entry2.description} at {entry2.start} are overlapping.",
                 log.output[0],
             )
+
+    def test_check_if_overlapping__overlapping_with_longer_earlier_entry(self):
+        entry1 = TimeEntryFactory(seconds=3 * SECONDS_IN_H)
+        entry2 = TimeEntryFactory(
+            start=entry1.start + datetime.timedelta(hours=1), seconds=SECONDS_IN_H
+        )
+        entry3 = TimeEntryFactory(start=entry2.stop, seconds=SECONDS_IN_H)
+        with self.assertLogs(level="WARN") as log:
+            check_if_overlapping([entry3, entry1, entry2])
+            self.assertEqual(len(log.output), 1)
+            self.assertIn("Found 2 issues:", log.output[0])
+            self.assertIn(
+                f"Entries: {entry1.description} at {entry1.stop}, "
+                f"{entry3.description} at {entry3.start} are overlapping.",
+                log.output[0],
+            )
@@ -0,0 +1,42 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase, mock
+
+from requests.exceptions import ChunkedEncodingError
+
+from toggl import FileExtension, MonthRange, ReportType, save_response
+
+
+class TestSaveResponse(TestCase):
+    def setUp(self):
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = f"{tmp.name}/"
+        self.month_range = MonthRange(6, 2023)
+
+    def save(self, chunks):
+        response = mock.Mock()
+        response.iter_content.return_value = chunks
+        save_response(
+            response, ReportType.SUM, FileExtension.PDF, self.month_range, self.directory
+        )
+
+    def read_report(self):
+        (filename,) = os.listdir(self.directory)
+        with open(f"{self.directory}{filename}", "rb") as report:
+            return report.read()
+
+    def test_save_response(self):
+        self.save([b"%PDF-", b"full"])
+        self.assertEqual(self.read_report(), b"%PDF-full")
+
+    def test_save_response__interrupted_download_keeps_previous_report(self):
+        self.save([b"%PDF-full"])
+
+        def interrupted():
+            yield b"%PDF-partial"
+            raise ChunkedEncodingError()
+
+        with self.assertRaises(ChunkedEncodingError):
+            self.save(interrupted())
+        self.assertEqual(self.read_report(), b"%PDF-full")
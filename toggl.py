@@ -2,14 +2,21 @@
 import os
 import argparse
 import calendar
+import json
 import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import MAXYEAR, MINYEAR, datetime, timedelta
 from enum import Enum
-from typing import List, Optional
+from itertools import chain, pairwise
+from operator import attrgetter
+from typing import List, Optional, Tuple
 
 import requests
 from requests import Response
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 USERNAME = ""
@@ -23,15 +30,45 @@ WORKSPACE_ID = ""
 BASE_URL = "https://api.track.toggl.com"
 API_URL = f"{BASE_URL}/api/v9"
 REPORTS_URL = (
-    BASE_URL
-    + "/reports/api/v3/workspace/{workspace_id}/{report_type}/time_entries{extension}"
+    f"{BASE_URL}/reports/api/v3/workspace/{WORKSPACE_ID}"
+    "/{report_type}/time_entries{extension}"
 )
 
 GSHEET_URL = (
     f"https://docs.google.com/spreadsheets/d/{SPREADSHEET_ID}/export?format=xlsx"
 )
 
+CACHE_DIR = "reports/.cache/"
+CACHE_MAX_AGE = timedelta(days=7)
+
 SECONDS_IN_H = 3600
+CHUNK_SIZE = 64 * 1024
+# Durations are displayed in hours rounded to 2 decimal places, so anything
+# that would be displayed as 8.0h is not reported as too long.
+MAX_ENTRY_SECONDS = 8 * SECONDS_IN_H + SECONDS_IN_H / 200
+
+# Reuse connections to the toggl api across consecutive report downloads.
+# Credentials are passed per request, so they aren't sent to google sheets.
+# Reports are downloaded concurrently, so retry the (POST) requests rejected
+# by the reports api rate limit up to 3 times. Retries wait as long as the
+# Retry-After header asks to, or else 0s, 2s and 4s. A 429 that is still
+# returned after that is raised by raise_for_status.
+SESSION = requests.Session()
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=2,
+        pool_maxsize=4,
+        max_retries=Retry(
+            total=3,
+            status_forcelist=[429],
+            allowed_methods=None,
+            respect_retry_after_header=True,
+            backoff_factor=1,
+            raise_on_status=False,
+        ),
+    ),
+)
 
 
 class ReportType(Enum):
@@ -58,29 +95,29 @@ class FileExtension(Enum):
 class MonthRange:
     _start: datetime
     _end: datetime
+    start: str
+    end: str
     days: int
     month: int
     year: int
 
-    @property
-    def start(self) -> str:
-        return self._start.strftime("%Y-%m-%d")
-
-    @property
-    def end(self) -> str:
-        return self._end.strftime("%Y-%m-%d")
-
     def __init__(self, month: Optional[int], year: Optional[int]) -> None:
         last_day_of_prev_month = datetime.now().replace(day=1) - timedelta(days=1)
         self.month = month or last_day_of_prev_month.month
         self.year = year or last_day_of_prev_month.year
+        if not 1 <= self.month <= 12:
+            raise ValueError(f"Month must be in 1..12, got {self.month}.")
+        if not MINYEAR <= self.year <= MAXYEAR:
+            raise ValueError(f"Year must be in {MINYEAR}..{MAXYEAR}, got {self.year}.")
 
         self._start = datetime(self.year, self.month, 1)
         _, self.days = calendar.monthrange(self._start.year, self._start.month)
         self._end = self._start + timedelta(days=self.days - 1)
+        self.start = self._start.strftime("%Y-%m-%d")
+        self.end = self._end.strftime("%Y-%m-%d")
 
 
-@dataclass
+@dataclass(slots=True)
 class TimeEntry:
     project_id: Optional[int]
     description: str
@@ -107,53 +144,121 @@ def parse_args():
         default=None,
         type=int,
     )
+    parser.add_argument(
+        "--cache",
+        help="Reuse the detailed report downloaded by a previous run for checks, "
+        "if it is less than a week old.",
+        action="store_true",
+    )
     return parser.parse_args()
 
 
 def run(args: argparse.Namespace):
     month_range = MonthRange(args.month, args.year)
 
-    check_correctness(month_range)
+    check_correctness(month_range, args.cache)
 
-    download_report(USERNAME, PASSWORD, ReportType.SUM, FileExtension.PDF, month_range)
-    download_report(USERNAME, PASSWORD, ReportType.DET, FileExtension.PDF, month_range)
-    download_report(USERNAME, PASSWORD, ReportType.DET, FileExtension.CSV, month_range)
-
-    if SPREADSHEET_ID:
-        download_invoice(ReportType.INVOICE, FileExtension.XLSX, month_range)
+    directory = f"reports/{month_range.month}.{month_range.year}/"
+    os.makedirs(directory, exist_ok=True)
+
+    # Reports are rendered server-side, so download them concurrently.
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        downloads = [
+            executor.submit(
+                download_report,
+                USERNAME,
+                PASSWORD,
+                report_type,
+                file_ext,
+                month_range,
+                directory,
+            )
+            for report_type, file_ext in [
+                (ReportType.SUM, FileExtension.PDF),
+                (ReportType.DET, FileExtension.PDF),
+                (ReportType.DET, FileExtension.CSV),
+            ]
+        ]
+        if SPREADSHEET_ID:
+            downloads.append(
+                executor.submit(
+                    download_invoice,
+                    ReportType.INVOICE,
+                    FileExtension.XLSX,
+                    month_range,
+                    directory,
+                )
+            )
+    for download in downloads:
+        download.result()
 
 
-def check_correctness(month_range: MonthRange) -> None:
-    time_entries = get_time_entries(month_range)
+def check_correctness(month_range: MonthRange, use_cache: bool = False) -> None:
+    time_entries = get_time_entries(month_range, use_cache)
     try:
         check_if_empty(time_entries)
         check_reasonable_time(time_entries)
         check_if_overlapping(time_entries)
     except Exception as e:
-        logging.warning(f"Raised exception {e} while checking for correctness.")
+        logging.warning("Raised exception %s while checking for correctness.", e)
 
 
-def get_time_entries(month_range: MonthRange) -> List[TimeEntry]:
+def get_time_entries(
+    month_range: MonthRange, use_cache: bool = False
+) -> List[TimeEntry]:
     """
     Download the list of time entries grouped by tasks and parse it
     to get a flat list of entries with their project and description.
     """
+    tasks = get_detailed_report(month_range, use_cache)
+    return [
+        TimeEntry(
+            task["project_id"],
+            task["description"],
+            datetime.fromisoformat(time_entry["start"]),
+            datetime.fromisoformat(time_entry["stop"]),
+            time_entry["seconds"],
+        )
+        for task in tasks
+        for time_entry in task["time_entries"]
+    ]
+
+
+def get_detailed_report(month_range: MonthRange, use_cache: bool) -> List[dict]:
+    """
+    Download the detailed report as json and save it in the cache directory.
+    If use_cache is set, the report saved by a previous run is reused instead,
+    as long as it's not older than CACHE_MAX_AGE.
+    """
+    filename = f"{CACHE_DIR}{WORKSPACE_ID}_{month_range.start}_{month_range.end}.json"
+    if use_cache and is_fresh(filename):
+        with open(filename, "rb") as cache:
+            return json.load(cache)
+
     response = get_report(
         USERNAME, PASSWORD, ReportType.DET, FileExtension.NONE, month_range
     )
-    tasks = response.json()
-    time_entries = []
-    for task in tasks:
-        for time_entry in task["time_entries"]:
-            task_with_time_entry = {
-                "project_id": task["project_id"],
-                "description": task["description"],
-                "start": datetime.fromisoformat(time_entry["start"]),
-                "stop": datetime.fromisoformat(time_entry["stop"]),
-                "seconds": time_entry["seconds"],
-            }
-            time_entries.append(TimeEntry(**task_with_time_entry))
-    return time_entries
+    tasks = json.loads(response.content)
+    # Write to a temporary file first, so that an interrupted write never
+    # leaves a broken report in the cache.
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=CACHE_DIR, delete=False) as cache:
+        try:
+            cache.write(response.content)
+            cache.close()
+            os.replace(cache.name, filename)
+        except BaseException:
+            os.unlink(cache.name)
+            raise
+    return tasks
+
+
+def is_fresh(filename: str) -> bool:
+    try:
+        modified = datetime.fromtimestamp(os.path.getmtime(filename))
+    except FileNotFoundError:
+        return False
+    return datetime.now() - modified < CACHE_MAX_AGE
 
 
 def get_report(
@@ -162,6 +267,7 @@ def get_report(
     report_type: ReportType,
     file_ext: FileExtension,
     month_range: MonthRange,
+    stream: bool = False,
 ) -> Response:
     # docs: https://developers.track.toggl.space/docs/reports/
     body = {
@@ -169,47 +275,101 @@ def get_report(
         "end_date": month_range.end,
     }
     url = REPORTS_URL.format(
-        workspace_id=WORKSPACE_ID,
         report_type=report_type.value,
         extension=file_ext.value,
     )
-    response = requests.post(url, json=body, auth=(user, password))
-    response.raise_for_status()
+    response = SESSION.post(url, json=body, auth=(user, password), stream=stream)
+    try:
+        response.raise_for_status()
+    except requests.HTTPError:
+        response.close()
+        raise
     return response
 
 
 def check_if_empty(entries: List[TimeEntry]) -> None:
+    issues = []
     for entry in entries:
         if not entry.description:
-            logging.warning(
-                f"Entry: {entry.project_id} at {entry.start} has empty description."
+            issues.append(
+                (
+                    "Entry: %s at %s has empty description.",
+                    (entry.project_id, entry.start),
+                )
             )
         if entry.project_id is None:
-            logging.warning(
-                f"Entry: {entry.description} at {entry.start} has empty project."
+            issues.append(
+                (
+                    "Entry: %s at %s has empty project.",
+                    (entry.description, entry.start),
+                )
             )
+    log_issues(issues)
 
 
 def check_reasonable_time(entries: List[TimeEntry]) -> None:
     """
     Displays a warning for entries that lasted over 8h.
     """
-    for entry in entries:
-        hours = round(entry.seconds / SECONDS_IN_H, 2)
-        if hours > 8:
-            logging.warning(
-                f"Entry: {entry.description} at {entry.start} lasted {hours}h."
+    log_issues(
+        [
+            (
+                "Entry: %s at %s lasted %sh.",
+                (entry.description, entry.start, round(entry.seconds / SECONDS_IN_H, 2)),
             )
+            for entry in entries
+            if entry.seconds >= MAX_ENTRY_SECONDS
+        ]
+    )
 
 
 def check_if_overlapping(entries: List[TimeEntry]) -> None:
-    time_intervals_sorted = sorted(entries, key=lambda entry: (entry.start, entry.stop))
-    for int1, int2 in zip(time_intervals_sorted, time_intervals_sorted[1:]):
-        if int2.start < int1.stop:
-            logging.warning(
-                f"Entries: {int1.description} at {int1.stop}, {int2.description} at "
-                f"{int2.start} are overlapping."
+    """
+    Sweeps through entries ordered by start time, keeping track of the one
+    that stops last, and displays a warning for every entry that starts
+    before it has stopped.
+    """
+    if are_consecutive(entries):
+        return
+    issues = []
+    time_intervals_sorted = iter(sorted(entries, key=attrgetter("start", "stop")))
+    latest = next(time_intervals_sorted, None)
+    for entry in time_intervals_sorted:
+        if entry.start < latest.stop:
+            issues.append(
+                (
+                    "Entries: %s at %s, %s at %s are overlapping.",
+                    (latest.description, latest.stop, entry.description, entry.start),
+                )
             )
+        if entry.stop > latest.stop:
+            latest = entry
+    log_issues(issues)
+
+
+def log_issues(issues: List[Tuple[str, tuple]]) -> None:
+    """
+    Displays all issues found by a check as a single warning. Issues are
+    (format, args) pairs, so messages are only formatted if it's emitted.
+    """
+    if len(issues) == 1:
+        msg, args = issues[0]
+        logging.warning(msg, *args)
+    elif issues:
+        msgs, args = zip(*issues)
+        logging.warning(
+            "Found %d issues:\n" + "\n".join(msgs),
+            len(issues),
+            *chain.from_iterable(args),
+        )
+
+
+def are_consecutive(entries: List[TimeEntry]) -> bool:
+    """
+    Checks if every entry starts after the previous one has stopped, which
+    is the usual case when entries are logged one after another.
+    """
+    return all(int2.start >= int1.stop for int1, int2 in pairwise(entries))
 
 
 def download_report(
@@ -218,19 +378,23 @@ def download_report(
     report_type: ReportType,
     file_ext: FileExtension,
     month_range: MonthRange,
+    directory: str,
 ) -> None:
-    response = get_report(user, password, report_type, file_ext, month_range)
-    save_response(response, report_type, file_ext, month_range)
+    with get_report(
+        user, password, report_type, file_ext, month_range, stream=True
+    ) as response:
+        save_response(response, report_type, file_ext, month_range, directory)
 
 
 def download_invoice(
     report_type: ReportType,
     file_ext: FileExtension,
     month_range: MonthRange,
+    directory: str,
 ) -> None:
-    response = requests.get(GSHEET_URL)
-    response.raise_for_status()
-    save_response(response, report_type, file_ext, month_range)
+    with SESSION.get(GSHEET_URL, stream=True) as response:
+        response.raise_for_status()
+        save_response(response, report_type, file_ext, month_range, directory)
 
 
 def save_response(
@@ -238,15 +402,23 @@ def save_response(
     report_type: ReportType,
     file_ext: FileExtension,
     month_range: MonthRange,
+    directory: str,
 ) -> None:
-    directory = f"reports/{month_range.month}.{month_range.year}/"
     filename = (
         f"{directory}{COMPANY}_{HANDLE}_{report_type.filename()}"
         f"_{month_range.start}_to_{month_range.end}{file_ext.value}"
     )
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
-    with open(filename, "wb+") as report:
-        report.write(response.content)
+    # Write to a temporary file first, so that a download interrupted midway
+    # never leaves a truncated report or replaces one from a previous run.
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as report:
+        try:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                report.write(chunk)
+            report.close()
+            os.replace(report.name, filename)
+        except BaseException:
+            os.unlink(report.name)
+            raise
 
 
 if __name__ == "__main__":